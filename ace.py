@@ -5,13 +5,189 @@ This module provides abilities for parsing ace files which come out of NJOY.
 """
 
 import os
-import collections
-import warnings
-import copy
-import textwrap
+import io
+import re
+import pickle
+import mmap
+import hashlib
+import threading
+import time
+import functools
+import pathlib
+import concurrent.futures
 
 import numpy
 
+# Number of bytes searched at a time when looking for newlines
+_block_size = 1 << 22
+
+# Number of files whose line offsets are kept by _lineOffsets
+_offset_files = 4
+
+# numpy.loadtxt has a C tokenizer from NumPy 1.23
+_fast_loadtxt = tuple(
+    int(v) for v in numpy.__version__.split('.')[:2]) >= (1, 23)
+
+# Whether parsed headers are cached (see _cacheDir). Entries for files that
+# have since changed are never read again; clearCache removes them.
+cacheHeaders = True
+
+# Whether XSS arrays are cached along with the headers. Each cached array
+# takes 8 bytes per entry of disk space. Only used when cacheHeaders is set.
+cacheXSS = False
+
+# Where parsed headers are cached; None for the default (see _cacheDir)
+_cache_dir = None
+
+# Names of the files written to the cache, including partially written ones
+_cache_pattern = re.compile(r'[0-9a-f]{16}(\.\d+\.\d+)?\.(pkl|npy)')
+
+# Change whenever the header attributes change so old caches aren't used
+_cache_version = 3
+
+# Attributes that are not cached with the header; the NXS/JXS views are
+# rebuilt and the rest only exist while the file is being read
+_transient = ('NXS', 'JXS', '_file', '_mtime', '_position')
+
+
+def _cacheDir():
+    """
+    _cacheDir returns the directory where parsed headers are cached, by default
+    a directory of this project's in the user's cache directory. It is only
+    looked up when needed, as the home directory may not be known.
+    """
+    if _cache_dir is not None:
+        return pathlib.Path(_cache_dir)
+
+    cache = os.environ.get('XDG_CACHE_HOME') or pathlib.Path.home() / '.cache'
+    return pathlib.Path(cache, 'DataListing', 'ace-headers')
+
+
+@functools.lru_cache(maxsize=_offset_files)
+def _lineOffsets(filename, mtime):
+    """
+    _lineOffsets returns the _LineOffsets of filename. Many tables are usually
+    read from the same file, so the offsets of the most recently used files
+    are kept and each part of a file is only searched for newlines once.
+
+    filename: Path of the file
+    mtime: Modification time of the file, so a changed file is searched again
+    """
+    return _LineOffsets(filename, mtime)
+
+
+class _LineOffsets(object):
+    """
+    _LineOffsets gives the byte offset of the beginning of a line of a file.
+    The file is only searched for newlines as far as the lines asked for, a
+    block of bytes at a time, so a table near the top of a large file doesn't
+    cost a search of the whole file. The offsets may be looked up from
+    several threads at once.
+    """
+
+    def __init__(self, filename, mtime):
+        self.file = _fileMap(filename, mtime)
+        self.offsets = numpy.zeros(1, dtype=numpy.int64)
+        self.searched = 0   # Number of bytes searched for newlines
+        self.lock = threading.Lock()
+
+    def __getitem__(self, line):
+        """
+        Returns the offset of line number line (counting from 0), or the
+        offsets of the lines in line if it is a slice (without a step). Raises
+        an IndexError if the file doesn't have that many lines; a slice is
+        instead cut short.
+        """
+        last = line.stop - 1 if isinstance(line, slice) else line
+        with self.lock:
+            if last >= len(self.offsets):
+                self._search(last)
+            offsets = self.offsets
+
+        if isinstance(line, slice):
+            return offsets[line]
+        return int(offsets[line])
+
+    def line(self, offset):
+        """
+        Returns the number of the line (counting from 0) beginning at byte
+        offset of the file, or None if no line begins there.
+        """
+        with self.lock:
+            while self.searched <= offset < len(self.file):
+                self._search(len(self.offsets))
+            offsets = self.offsets
+
+        line = int(numpy.searchsorted(offsets, offset))
+        if line < len(offsets) and offsets[line] == offset:
+            return line
+        return None
+
+    def _search(self, line):
+        """
+        _search will search the file for newlines until the offset of line is
+        known or the end of the file is reached. At least as many bytes as
+        have already been searched are searched again, so reading forward
+        through a file only grows the offsets a few times.
+        """
+        end = min(len(self.file), 2*self.searched + _block_size)
+        offsets = [self.offsets]
+        found = len(self.offsets)
+        while self.searched < len(self.file) and (
+                found <= line or self.searched < end):
+            block = self.file[self.searched:self.searched+_block_size]
+            newlines = numpy.flatnonzero(
+                numpy.frombuffer(block, dtype=numpy.uint8) == ord('\n'))
+            offsets.append(newlines + self.searched + 1)
+            found += len(newlines)
+            self.searched += len(block)
+
+        self.offsets = numpy.concatenate(offsets)
+
+
+@functools.lru_cache(maxsize=_offset_files)
+def _fileMap(filename, mtime):
+    """
+    _fileMap returns a read-only memory map of filename. The maps of the most
+    recently used files are kept, so tables from the same file share one map
+    instead of each opening and mapping the file. The map is only ever
+    sliced, never seeked, so tables may share it across threads.
+
+    filename: Path of the file
+    mtime: Modification time of the file, so a changed file is mapped again
+    """
+    with open(filename, 'rb') as stream:
+        return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _OneBased(object):
+    """
+    _OneBased is a read-only view of an array that is indexed starting at 1,
+    as the NXS and JXS arrays are in the MCNP manual. It behaves like a
+    dictionary mapping the 1-based index to the entry of the array.
+    """
+    __slots__ = ('array',)
+
+    def __init__(self, array):
+        self.array = array
+
+    def __getitem__(self, i):
+        if not 1 <= i <= len(self.array):
+            raise KeyError(i)
+        return self.array[i-1]
+
+    def __len__(self): return len(self.array)
+
+    def __iter__(self): return iter(range(1, len(self.array)+1))
+
+    def keys(self): return range(1, len(self.array)+1)
+
+    def values(self): return iter(self.array)
+
+    def items(self): return zip(self.keys(), self.array)
+
+    def __repr__(self): return repr(dict(self.items()))
+
 
 class ace(object):
     """
@@ -44,11 +220,7 @@ class ace(object):
             try:
                 xsdir_entry = xsdir.zaids[zaid]
             except KeyError:    # zaid is not a full or accurate zaid
-
-                if isinstance(zaid, int):
-                    xsdir_entry = xsdir[zaid][0]
-                elif isinstance(zaid, str) or isinstance(zaid, unicode):
-                    xsdir_entry = xsdir[zaid][0]
+                xsdir_entry = xsdir[zaid][0]
 
             # Get filename of data file
             parent, tail = os.path.split(xsdir.filename)
@@ -61,89 +233,312 @@ class ace(object):
         # Don't know what to do
         else: raise SyntaxError("I can't determine what data to process.")
 
-        super(ace, self).__init__()
+        super().__init__()
         self.headerOnly = headerOnly
 
         # Set aside space for storing cross sections
-        self.xs = collections.OrderedDict()
+        self.xs = {}
 
-        # Open file and move to starting line number
-        self._file = open(self.filename, 'r')
-        for i in range(self.start_line-1):
-            line = self._file.readline()
+        # Header (and XSS array) may already be cached from an earlier read
+        # of this table
+        attributes = set(vars(self))
+        cache = self._headerCache() if cacheHeaders else None
+        cached = cache is not None and self._loadHeader(cache)
+        if cached and (self.headerOnly or (cacheXSS and self._loadXSS(cache))):
+            return
+
+        # Map file into memory and move to starting line number
+        self._mapFile()
+        self._seekLine(self.start_line)
 
         # Get header (first 12 lines)
         self._processHeader()
+        if cache is not None and not cached:
+            self._saveHeader(cache, set(vars(self)) - attributes)
 
         if not self.headerOnly:
             # Read XSS array
-            self.XSS = self._XSS = numpy.fromfile(self._file, dtype=float,
-                sep=' ', count = self._NXS[0]) # Number of entries on XSS array
+            self.XSS = self._XSS = self._readXSS(
+                self._NXS[0]) # Number of entries on XSS array
+            self._XSS.setflags(write=False)
+            if cache is not None and cacheXSS:
+                self._saveXSS(cache)
 
             # Process XSS array
             # self._processXSS()
 
-        self._file.close()
+        del self._file, self._mtime, self._position
+
+    def _headerCache(self):
+        """
+        _headerCache returns the path of the file caching the parsed header of
+        this table. The name is a hash of the absolute path, modification time,
+        size and starting line, so a file that has changed is never read from
+        the cache, and of the version of the cached attributes and of NumPy,
+        whose arrays are pickled with the header. Returns None if there is no
+        directory to cache in.
+        """
+        try:
+            directory = _cacheDir()
+        except RuntimeError:    # The home directory isn't known
+            return None
+
+        stat = os.stat(self.filename)
+        key = "{}|{}|{}|{}|{}|{}".format(os.path.abspath(self.filename),
+            stat.st_mtime_ns, stat.st_size, self.start_line, _cache_version,
+            numpy.__version__)
+        name = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return pathlib.Path(directory, name + '.pkl')
+
+    def _loadHeader(self, cache):
+        """
+        _loadHeader will set the header attributes from cache. Returns False
+        if the header isn't cached or can't be read.
+
+        cache: Path to the cached header
+        """
+        # Anything can go wrong unpickling a cache written by another version
+        # of Python or NumPy (e.g., a missing module); it is then parsed again
+        try:
+            with open(cache, 'rb') as stream:
+                header = pickle.load(stream)
+            NXS, JXS = header['_NXS'], header['_JXS']
+            NXS.setflags(write=False)
+            JXS.setflags(write=False)
+        except Exception:
+            return False
+
+        vars(self).update(header)
+
+        self.NXS = _OneBased(self._NXS)
+        self.JXS = _OneBased(self._JXS)
+        return True
+
+    def _saveHeader(self, cache, names):
+        """
+        _saveHeader will write the header attributes given by names to cache.
+        Failing to write the cache is not an error; the header is simply parsed
+        again next time.
+
+        cache: Path to the cached header
+        names: Names of the header attributes
+        """
+        header = {name: getattr(self, name) for name in names
+                  if name not in _transient}
+        # readTables parses tables on several threads of the same process
+        partial = cache.with_name('{}.{}.{}.pkl'.format(
+            cache.stem, os.getpid(), threading.get_ident()))
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            with open(partial, 'wb') as stream:
+                pickle.dump(header, stream, pickle.HIGHEST_PROTOCOL)
+            os.replace(partial, cache)
+        except OSError:
+            pass
+
+    def _loadXSS(self, cache):
+        """
+        _loadXSS will memory-map the XSS array cached next to the header.
+        Returns False if the array isn't cached or can't be read.
+
+        cache: Path to the cached header
+        """
+        try:
+            XSS = numpy.load(cache.with_suffix('.npy'), mmap_mode='r')
+        except (OSError, ValueError):
+            return False
+
+        if len(XSS) != self._NXS[0]:
+            return False
+
+        self.XSS = self._XSS = XSS
+        return True
+
+    def _saveXSS(self, cache):
+        """
+        _saveXSS will write the XSS array next to the cached header so that
+        later reads of this table map it from disk instead of parsing it.
+        Failing to write the cache is not an error.
+
+        cache: Path to the cached header
+        """
+        path = cache.with_suffix('.npy')
+        partial = path.with_name('{}.{}.{}.npy'.format(
+            path.stem, os.getpid(), threading.get_ident()))
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            numpy.save(partial, self._XSS)
+            os.replace(partial, path)
+        except OSError:
+            pass
+
+    def _mapFile(self):
+        """
+        _mapFile will set self._file to the memory map of the file (see
+        _fileMap) and move to its beginning. The position in the file is kept
+        in self._position rather than in the shared map.
+        """
+        self._mtime = os.stat(self.filename).st_mtime_ns
+        self._file = _fileMap(self.filename, self._mtime)
+        self._position = 0
+
+    def _seekLine(self, line):
+        """
+        _seekLine will move to the beginning of line number line (counting from
+        1) of the file using the offsets of the lines found by _lineOffsets.
+        """
+        if line > 1:
+            offsets = _lineOffsets(self.filename, self._mtime)
+            self._position = offsets[line-1]
+
+    def _readlines(self, count):
+        """
+        _readlines returns the next count lines of the file as a list of
+        strings. The lines are sliced from the mapped file in one piece rather
+        than being read one at a time.
+
+        count: Number of lines to read
+        """
+        start = self._position
+        size = 128*(count+1)
+        while True:
+            lines = self._file[start:start+size].splitlines(True)
+            if len(lines) > count or start+size >= len(self._file):
+                break
+            size *= 2
+
+        lines = lines[:count]
+        self._position = start + sum(map(len, lines))
+        return [line.decode() for line in lines]
+
+    def _readXSS(self, count):
+        """
+        _readXSS will read count entries of the XSS array starting at the
+        current position in the file. The XSS array is written four entries to
+        a line, so the block of bytes holding the array is sliced from the
+        mapped file and tokenized in a single pass rather than reading one
+        entry at a time.
+
+        count: Number of entries on the XSS array
+        """
+        start = self._position
+        eol = self._file.find(b'\n', start)
+        width = (eol if eol >= 0 else len(self._file)) + 1 - start
+
+        # Full lines go through NumPy's C tokenizer; the last, partial line
+        # is split separately. This only works if the lines all have the
+        # width of the first, i.e., the block ends on a newline.
+        lines, extra = divmod(count, 4)
+        end = start + width*lines
+        if _fast_loadtxt and lines and self._file[end-1:end] == b'\n':
+            XSS = numpy.empty(count, dtype=numpy.float64)
+            eol = self._file.find(b'\n', end)
+            tail = self._file[end:eol if eol >= 0 else len(self._file)]
+            try:
+                XSS[:4*lines] = numpy.loadtxt(io.BytesIO(self._file[start:end]),
+                        dtype=numpy.float64, ndmin=2).ravel()
+                if extra:
+                    XSS[4*lines:] = tail.split()
+                return XSS
+            except ValueError:  # Not four entries to a line
+                pass
+
+        # Otherwise split a block big enough for four entries to a line of
+        # the first line's width, and a bigger one until it holds them all
+        size = width*(-(-count//4))
+        while True:
+            stop = start + size
+            words = self._file[start:stop].split(None, count)
+
+            # The slice may end partway through an entry; that is only
+            # harmless if the entry is past the ones needed
+            whole = (stop >= len(self._file)
+                     or self._file[stop-1:stop].isspace())
+            if (len(words) > count or (len(words) == count and whole)
+                    or stop >= len(self._file)):
+                break
+            size *= 2
+
+        return numpy.array(words[:count], dtype=numpy.float64)
 
     def _processHeader(self):
         """
         _processHeader is called to process the header
         """
+        # Read the lines of an old-style header all at once
+        lines = self._readlines(12)
+
         # Determine if we are using old- or new-style header
-        line = self._file.readline().strip()
-        words = line.split()
+        words = lines[0].split()
 
         version = words[0]
         if len(version.split('.')) < 3:
             # Old-style header
             self.isNewStyle = False
 
-            self._processOldStyleHeader(words)
+            self._processOldStyleHeader(words, lines[1])
+            header = lines[2:]
         else:
             # New-style header
             self.isNewStyle = True
 
-            self._processNewStyleHeader(words)
+            # Comment lines come before the rest of the header
+            NComments = int(lines[1].split()[3])
+            lines += self._readlines(NComments)
 
-        header = []
-        for i in range(10): header.append(self._file.readline().strip())
+            self._processNewStyleHeader(words, lines[1:2+NComments])
+            header = lines[2+NComments:]
 
         # IZ, AW
-        izaw = ' '.join(header[:4]).split()
-        self._IZ = numpy.array( [ izaw[i] for i in range(len(izaw)) if not i%2],
-                dtype=numpy.int)
-        self._AW = numpy.array( [ izaw[i] for i in range(len(izaw)) if i%2],
-                dtype=numpy.float)
+        izaw = []
+        for line in header[:4]: izaw.extend(line.split())
+        self._IZ = numpy.array(list(map(int, izaw[0::2])), dtype=numpy.int64)
+        self._AW = numpy.array(list(map(float, izaw[1::2])),
+                dtype=numpy.float64)
 
         # NXS
-        NXS = ' '.join(header[4:6])
-        self._NXS = numpy.fromstring(NXS, dtype='i8', sep=' ')
-        self.NXS = collections.OrderedDict()
-        for i, n in enumerate(self._NXS): self.NXS[i+1] = n
+        NXS = []
+        for line in header[4:6]: NXS.extend(line.split())
+        self._NXS = numpy.fromiter(map(int, NXS), dtype=numpy.int64,
+                count=len(NXS))
+        self._NXS.setflags(write=False)
+        self.NXS = _OneBased(self._NXS)
 
         # JXS
-        JXS = ' '.join(header[6:])
-        self._JXS = numpy.fromstring(JXS, dtype='i8', sep=' ')
-        self.JXS = collections.OrderedDict()
-        for i, n in enumerate(self._JXS): self.JXS[i+1] = n
+        JXS = []
+        for line in header[6:]: JXS.extend(line.split())
+        self._JXS = numpy.fromiter(map(int, JXS), dtype=numpy.int64,
+                count=len(JXS))
+        self._JXS.setflags(write=False)
+        self.JXS = _OneBased(self._JXS)
+
+        # XSS array starts right after the header
+        self._XSSOffset = self._position
 
-    def _processNewStyleHeader(self, firstWords):
+    def _processNewStyleHeader(self, firstWords, lines):
         """
         _processNewStyleHeader will process the header according to the
         new-style.
 
         firstWords: The first line of the data table split by white space
+        lines: The second line of the data table followed by the comment lines
         """
         # Process first line
         self.Version = firstWords[0]
 
         self._HZ = self.ZAID = self.full_zaid = firstWords[1]
         self.zaid, self.zaid_suffix = self.ZAID.split('.')
+        try:
+            self.Z, self.A = divmod(int(self.zaid), 1000)
+
+        except ValueError:  # Probably S(a,B)
+            self.Z = None
+            self.A = None
 
         self.Source = firstWords[2]
 
         # Process second line
-        words = self._file.readline().strip().split()
+        words = lines[0].split()
         # Atomic weight ratio
         self._AW0 = self.atomic_weight_ratio = float(words[0])
         # Temperature
@@ -153,29 +548,25 @@ class ace(object):
         # Number of comment lines
         self._NComments = int(words[3])
 
-        # Read the comment lines
-        comments = []
-        for n in range(self._NComments):
-            comments.append(self._file.readline().strip())
-
-        self.CommentLines = '\n'.join(comments)
+        # Comment lines
+        self.CommentLines = '\n'.join(
+            line.strip() for line in lines[1:1+self._NComments])
 
-    def _processOldStyleHeader(self, firstWords):
+    def _processOldStyleHeader(self, firstWords, line):
         """
         _processOldStyleHeader will process the header according to the
         old-style.
 
         firstWords: The first line of the data table split by white space
+        line: The second line of the data table
         """
         # ZAID
         self._HZ = self.ZAID = firstWords[0]
         self.zaid, self.suffix = self.ZAID.split('.')
         self.full_zaid = self.ZAID
-        self.zaid = self.zaid
         try:
             self.zaid = int(self.zaid)
-            self.Z = int(self.zaid/1000)
-            self.A = int(self.zaid-self.Z*1000)
+            self.Z, self.A = divmod(self.zaid, 1000)
 
         except ValueError:  # Probably S(a,B)
             self.Z = None
@@ -191,12 +582,104 @@ class ace(object):
         except IndexError as e:
             self._HD = self.process_date = ''
 
-        line = self._file.readline().rstrip()
+        line = line.rstrip()
         # Comment
         self._HK = self.comment = line[:70].rstrip()
         # Material ID
         self._HM = self.mat_ID = line[70:].strip()
 
+    def peekXSS(self, indices):
+        """
+        peekXSS returns the entries of the XSS array at indices (counting from
+        0, negative indices counting from the end as for a NumPy array) without
+        reading the whole array when only the header has been read. The XSS
+        array is written four entries to a line of a fixed width, so only the
+        lines holding the requested entries are read, found from the offsets of
+        the lines (see _lineOffsets). The layout is checked from the widths of
+        every line up to the last requested entry, and the number of entries on
+        the first line and the lines read; if the lines aren't laid out that
+        way, the entries up to the last requested one are read instead.
+
+        indices: Sequence of indices into the XSS array
+        """
+        if hasattr(self, '_XSS'):
+            return self._XSS[list(indices)]
+
+        length = self._NXS[0]
+        wrapped = []
+        for index in indices:
+            if not -length <= index < length:
+                raise IndexError("XSS index {} out of range".format(index))
+            wrapped.append(index % length)
+
+        if not wrapped:
+            return numpy.array([], dtype=numpy.float64)
+
+        # Number of lines, and of entries on the last line, of the XSS array
+        final = (length-1)//4
+        extra = length - 4*final
+
+        self._mapFile()
+        try:
+            last = max(wrapped)//4
+            lines = self._peekLines(sorted({0, *(i//4 for i in wrapped)}),
+                                    last, final)
+            counts = {line: 4 if line < final else extra for line in lines}
+            if not lines or any(len(lines[line]) != counts[line]
+                                for line in lines):
+                self._position = self._XSSOffset
+                return self._readXSS(max(wrapped)+1)[wrapped]
+        finally:
+            del self._file, self._mtime, self._position
+
+        return numpy.array([lines[i//4][i % 4] for i in wrapped],
+                dtype=numpy.float64)
+
+    def _peekLines(self, wanted, last, final):
+        """
+        _peekLines returns a dictionary mapping the lines in wanted (counting
+        from 0 at the start of the XSS array) to their words. The lines of the
+        XSS array up to line last must all have the width of the first, except
+        the last line of the array, line final; otherwise an empty dictionary
+        is returned.
+
+        wanted: Sorted line numbers to be read
+        last: The last line that must be checked
+        final: The last line of the XSS array
+        """
+        offsets = _lineOffsets(self.filename, self._mtime)
+        first = offsets.line(self._XSSOffset)
+        if first is None:
+            return {}
+
+        # Beginnings of the lines and the end of line last; the last line of
+        # the file may not end with a newline
+        bounds = offsets[first:first+last+2]
+        if len(bounds) == last+1 and bounds[-1] < len(self._file):
+            bounds = numpy.append(bounds, len(self._file))
+        if len(bounds) != last+2:
+            return {}
+
+        # Full lines up to line last have the width of the first
+        widths = numpy.diff(bounds[:min(last, final-1)+2])
+        if len(widths) and (widths != widths[0]).any():
+            return {}
+
+        return {line: self._file[bounds[line]:bounds[line+1]].split()
+                for line in wanted}
+
+    def block(self, jxs, length):
+        """
+        block returns a view of length entries of the XSS array starting at the
+        location given by JXS[jxs]. The XSS array is read-only, so the view
+        must be copied if it is to be modified.
+
+        jxs: Index (counting from 1) of the JXS entry locating the block
+        length: Number of entries in the block
+        """
+        start = self.JXS[jxs] - 1
+        return self._XSS[start:start+length]
+
     def _processNXS(self):
         """
         _processNXS will process the array self._NXS and set other class
@@ -220,6 +703,95 @@ class ace(object):
 
     def __repr__(self): return self.filename
 
+
+# Header fields of a table as stored by headerArray
+headerDtype = numpy.dtype([
+    ('ZAID', 'U16'),
+    ('Z', numpy.int32),
+    ('A', numpy.int32),
+    ('AWR', numpy.float64),
+    ('temperature', numpy.float64),
+    ('NXS', numpy.int64, (16,)),
+    ('JXS', numpy.int64, (32,)),
+])
+
+def headerArray(tables):
+    """
+    headerArray returns the headers of many ace objects as a structured array
+    with one row per table (see headerDtype). This allows a whole library of
+    tables to be searched with vectorized operations instead of looping over
+    the ace objects, e.g.,
+
+        headers = headerArray(tables)
+        headers[headers['NXS'][:, 2] > 1000]
+
+    Z and A are 0 when they are not known (e.g., S(a,b) tables).
+
+    tables: Sequence of ace objects
+    """
+    headers = numpy.zeros(len(tables), dtype=headerDtype)
+    for i, table in enumerate(tables):
+        headers[i] = (table.ZAID, getattr(table, 'Z', None) or 0,
+                      getattr(table, 'A', None) or 0,
+                      table.atomic_weight_ratio, table.temperature,
+                      table._NXS, table._JXS)
+
+    return headers
+
+def readTables(tables, headerOnly=True, workers=None):
+    """
+    readTables will read many tables using a pool of threads so that waiting
+    on the disk for one table overlaps with parsing another. The tables are
+    submitted sorted by filename and starting line so each file is read front
+    to back. Returns the ace objects in the same order as tables.
+
+    tables: Sequence of (filename, start_line) pairs, e.g., the path and
+        address columns of an xsdir
+    headerOnly: If True, then only the header of each table is read
+    workers: Number of threads. Defaults to the concurrent.futures default.
+    """
+    order = sorted(range(len(tables)),
+                   key=lambda i: (str(tables[i][0]), tables[i][1]))
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        futures = {}
+        for i in order:
+            filename, start_line = tables[i]
+            futures[i] = pool.submit(ace, filename=filename,
+                    start_line=start_line, headerOnly=headerOnly)
+
+    return [futures[i].result() for i in range(len(tables))]
+
+def clearCache(maxAge=None):
+    """
+    clearCache will remove the cached headers and XSS arrays (see cacheHeaders
+    and cacheXSS). Nothing else ever removes them, so entries for files that
+    have changed or been deleted pile up until clearCache is called. Returns
+    the number of files removed.
+
+    maxAge: If given, only entries written more than maxAge seconds ago are
+        removed; entries still in use are simply written again when next read
+    """
+    removed = 0
+    try:
+        paths = list(_cacheDir().iterdir())
+    except (OSError, RuntimeError):     # Nothing has been cached
+        return removed
+
+    now = time.time()
+    for path in paths:
+        # Only files written by ace are removed
+        if not _cache_pattern.fullmatch(path.name):
+            continue
+        try:
+            if maxAge is None or now - path.stat().st_mtime > maxAge:
+                path.unlink()
+                removed += 1
+        except OSError:
+            pass
+
+    return removed
+
 if __name__ == "__main__":
     print("\n\nI'm an ACE!\n")
 
@@ -17,6 +17,10 @@ import ace
 
 xsdirName = "xsdir.json"
 
+# The columns of an XSDIR row used by DataDirectory.extend. Defined at module
+# level so rows can be pickled to worker processes.
+_Entry = collections.namedtuple('_Entry', ['ZAID', 'address', 'lib_type', 'ZA'])
+
 class DataDirectory:
     def __init__(self, xsdirPath):
         self.problems = []
@@ -35,24 +39,36 @@ class DataDirectory:
         }
 
         AWRs, self.XSDIR = xsdir.readXSDIR(xsdirPath)
+        # A library has only a few distinct values of these
+        self.XSDIR = self.XSDIR.astype(
+            {'lib_type': 'category', 'library': 'category', 'path': 'category'})
+
+        # Rows of XSDIR by index; extend is called for every row and .loc
+        # would build a Series each time
+        self._entries = dict(zip(self.XSDIR.index, map(_Entry._make, zip(
+            *(self.XSDIR[name] for name in _Entry._fields)))))
+        # Full path of each row's ACE file
+        self._paths = dict(zip(self.XSDIR.index,
+            [os.path.join(self.datapath, p) for p in self.XSDIR['path']]))
 
     def _fastNeutron(self, entry, ACE):
         """
         Add metadata from all fast neutron ACE files.
 
-        entry: Row of pandas data frame object
+        entry: _Entry holding the XSDIR row
         """
         meta = {}
         NE = int(ACE.NXS[3])
         meta[ 'NE'] = NE
-        meta[ 'Emax'] = round(ACE.XSS[NE-1], 1)
-        if (ACE.JXS[12] != 0) or (ACE.JXS[13] != 0):
-            meta[ 'GPD'] = True
-        else:
-            meta[ 'GPD'] = False
+        # The last energy and, if there is a NU block, its first entry are
+        # peeked at together
+        indices = [NE-1] + ([ACE.JXS[2] - 1] if ACE.JXS[2] != 0 else [])
+        XSS = ACE.peekXSS(indices)
+        meta[ 'Emax'] = round(XSS[0], 1)
+        meta[ 'GPD'] = bool(ACE.JXS[12] or ACE.JXS[13])
 
         if ACE.JXS[2] != 0:
-            if ACE._XSS[(ACE.JXS[2] - 1)] > 0:
+            if XSS[1] > 0:
                 meta[ 'nubar'] = 'nubar'
             else:
                 meta[ 'nubar'] = 'both'
@@ -60,20 +76,11 @@ class DataDirectory:
             meta[ 'nubar'] = 'no'
 
         # Charged particle  see XTM:96-200
-        if ACE.NXS[7] > 0:
-            meta[ 'CP'] = True
-        else:
-            meta[ 'CP'] = False
+        meta[ 'CP'] = bool(ACE.NXS[7] > 0)
         # Delayed neutron
-        if ACE.JXS[24] > 0:
-            meta[ 'DN'] = True
-        else:
-            meta[ 'DN'] = False
+        meta[ 'DN'] = bool(ACE.JXS[24] > 0)
         # Unresolvedresonance
-        if ACE.JXS[23] > 0:
-            meta[ 'UR'] = True
-        else:
-            meta[ 'UR'] = False
+        meta[ 'UR'] = bool(ACE.JXS[23] > 0)
 
         return meta
 
@@ -81,7 +88,7 @@ class DataDirectory:
         """
         Add metadata from thermal scattering ACE files.
 
-        entry: Row of pandas data frame object
+        entry: _Entry holding the XSDIR row
         """
         meta = {}
         meta['NA'] = int(ACE.NXS[3] + 1)
@@ -99,7 +106,7 @@ class DataDirectory:
         """
         Add metadata from photon ACE files.
 
-        entry: Row of pandas data frame object
+        entry: _Entry holding the XSDIR row
         """
         meta = {}
         meta['NE'] = int(ACE.NXS[3])
@@ -109,15 +116,16 @@ class DataDirectory:
         """
         Add metadata from the charged-particle ACE files.
 
-        entry: Row of pandas data frame object
+        entry: _Entry holding the XSDIR row
         """
 
         meta = {}
         NE = int(ACE.NXS[3])
         meta['target'] = entry.ZA
         meta['NE'] = NE
-        meta['Emin'] = round(ACE.XSS[0], 1)
-        meta['Emax'] = round(ACE.XSS[NE-1], 1)
+        Emin, Emax = ACE.peekXSS([0, NE-1])
+        meta['Emin'] = round(Emin, 1)
+        meta['Emax'] = round(Emax, 1)
         return meta
 
     def _default(self, entry, ACE):
@@ -130,11 +138,13 @@ class DataDirectory:
         """
         extend will add metadata to a row of self.XSDIR given the row's index
         """
-        entry = self.XSDIR.loc[index]
-        path = pathlib.Path(self.datapath, entry.path)
+        entry = self._entries[index]
+        path = self._paths[index]
 
         address = entry.address
-        ACE = ace.ace(filename=path, headerOnly=False, start_line=address)
+        # Only the header is read; metadata functions peek at the few XSS
+        # entries they need
+        ACE = ace.ace(filename=path, headerOnly=True, start_line=address)
 
         meta = {'ZAID': entry.ZAID}
 
@@ -148,64 +158,83 @@ class DataDirectory:
         return meta
 
 
+def _asList(value):
+    """
+    _asList returns value if it is a list, otherwise a list holding value
+    """
+    return value if isinstance(value, list) else [value]
+
+
+# Columns shown by DisplayData for each lib_type
+_display_columns = {
+    'c':  ('ZAID', 'AWR', 'library', 'path','ZA', 'T(K)', 'Date', 'NE',
+           'Emax', 'GPD', 'nubar', 'CP', 'DN', 'UR'),
+    'nc': ('ZAID', 'AWR', 'library',  'path','ZA', 'T(K)', 'Date', 'NE',
+           'Emax', 'GPD', 'nubar', 'CP', 'DN', 'UR'),
+    't': ('ZAID', 'library', 'path','ZA', 'T(K)', 'Date', 'NE', 'NA',
+          'representation'),
+    'h': ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
+          'Emin', 'Emax'),
+    'o': ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
+          'Emin', 'Emax'),
+    'r': ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
+          'Emin', 'Emax'),
+    's': ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
+          'Emin', 'Emax'),
+    'a': ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
+          'Emin', 'Emax'),
+    None: ('ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date'),
+}
+
+
 class DisplayData:
+    __slots__ = ('XSDIR', 'lib_type', 'columns')
+
     def __init__(self, XSDIR, lib_type=None):
 
         if lib_type:
-            self.XSDIR = XSDIR.query('lib_type == @lib_type')
+            self.XSDIR = XSDIR[XSDIR['lib_type'].isin(_asList(lib_type))]
         else:
             self.XSDIR = XSDIR
         self.lib_type = lib_type
 
-        self.displayColumns = {
-            'c':  ['ZAID', 'AWR', 'library', 'path','ZA', 'T(K)', 'Date', 'NE',
-                       'Emax', 'GPD', 'nubar', 'CP', 'DN', 'UR'],
-            'nc': ['ZAID', 'AWR', 'library',  'path','ZA', 'T(K)', 'Date', 'NE',
-                       'Emax', 'GPD', 'nubar', 'CP', 'DN', 'UR'],
-            't': ['ZAID', 'library', 'path','ZA', 'T(K)', 'Date', 'NE', 'NA',
-                  'representation'],
-            'h': ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
-                  'Emin', 'Emax'],
-            'o': ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
-                  'Emin', 'Emax'],
-            'r': ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
-                  'Emin', 'Emax'],
-            's': ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
-                  'Emin', 'Emax'],
-            'h': ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date', 'NE',
-                  'Emin', 'Emax'],
-            None: ['ZAID', 'AWR', 'library', 'path', 'ZA', 'T(K)', 'Date'],
-        }
+        # Default columns, from the first lib_type when given several
+        lt = _asList(lib_type)[0]
+        self.columns = list(_display_columns.get(lt, _display_columns[None]))
 
     def __call__(self, ZA=None, columns=[]):
         """
         """
-        if isinstance(self.lib_type, list):
-            lt = self.lib_type[0]
-        else:
-            lt = self.lib_type
-
-        defaultColumns = ['ZAID', 'AWR', 'library', 'path','ZA', 'T(K)', 'Date']
-        if not columns:
-            columns = self.displayColumns.get(lt, defaultColumns)
+        columns = list(columns) or self.columns
 
         if ZA:
-            XSDIR = self.XSDIR.query('ZA == @ZA')
+            XSDIR = self.XSDIR[self.XSDIR['ZA'].isin(_asList(ZA))]
         else:
             XSDIR = self.XSDIR
 
-        IPython.display.display(XSDIR[[*columns]])
+        IPython.display.display(XSDIR.loc[:, columns])
 
     def _default(self, ZA=None, columns=[]):
         """
         The display function when lib_type doesn't exist
         """
         if columns:
-            IPython.display.display(self.XSDIR[[*columns]])
+            IPython.display.display(self.XSDIR.loc[:, list(columns)])
         else:
             IPython.display.display(self.XSDIR)
 
 
+# Columns written by generateJSON whose types are known ahead of time
+_json_dtype = {
+    'GPD': bool,
+    'CP': bool,
+    'DN': bool,
+    'UR': bool,
+    'NE': 'int32',
+    'length': 'int64',
+    'Emax': 'float64',
+}
+
 def loadXSDIR(filename=xsdirName):
     """
     loadXSDIR will create a pandas DataFrame from a json file on disk. It will
@@ -214,7 +243,13 @@ def loadXSDIR(filename=xsdirName):
     path = pathlib.Path(filename)
 
     if path.exists():
-        return pd.read_json(path)
+        XSDIR = pd.read_json(path, orient='records', dtype=_json_dtype)
+        # These only take a few values each; nubar and representation are
+        # absent from a neutron-free listing, the others from an empty one
+        XSDIR = XSDIR.astype({name: 'category'
+            for name in ('lib_type', 'library', 'nubar', 'representation')
+            if name in XSDIR})
+        return XSDIR
     else:
         print(textwrap.dedent("""
             Can't read XSDIR information from file:
@@ -224,6 +259,23 @@ def loadXSDIR(filename=xsdirName):
         print("Please first run: python listing.py to generate {}"
               .format(xsdirName))
 
+# DataDirectory of a generateJSON worker process
+_ddir = None
+
+def _initWorker(ddir):
+    """
+    _initWorker will keep ddir in the worker process so it is sent once per
+    worker instead of with every chunk of entries.
+    """
+    global _ddir
+    _ddir = ddir
+
+def _extend(index):
+    """
+    _extend will return the metadata of the worker's row given by index
+    """
+    return _ddir.extend(index)
+
 def generateJSON(xsdirPath, N=max(1, mp.cpu_count()-1)):
     """
     generateJSON will generate the JSON version of the XSDIR pandas DataFrame.
@@ -233,9 +285,19 @@ def generateJSON(xsdirPath, N=max(1, mp.cpu_count()-1)):
     ddir = DataDirectory(xsdirPath)
 
     # ddir.XSDIR = ddir.XSDIR.query('ZA == 1001 or ZA == "lwtr"')
-    with mp.Pool(N) as pool:
-        results = list(
-            tqdm(pool.imap(ddir.extend, ddir.XSDIR.index), total=len(ddir.XSDIR)))
+    # Each worker is given ddir once; hand out the entries in chunks to cut
+    # down on messages to the workers
+    chunksize = max(1, len(ddir.XSDIR)//(4*N))
+    # Hand out the entries file by file and in address order so each chunk
+    # reads forward through one ACE file with its line offsets cached
+    order = ddir.XSDIR.sort_values(['path', 'address'], kind='stable').index
+    with mp.Pool(N, initializer=_initWorker, initargs=(ddir,)) as pool:
+        # tqdm comes first so zip asks it for the item past the last, which
+        # finishes and closes the progress bar
+        results = {index: meta for meta, index in zip(tqdm(
+            pool.imap(_extend, order, chunksize=chunksize),
+            total=len(ddir.XSDIR)), order)}
+    results = [results[index] for index in ddir.XSDIR.index]
 
     dtype = {
         'Date': str,
@@ -258,13 +320,19 @@ def generateJSON(xsdirPath, N=max(1, mp.cpu_count()-1)):
         'target': int,
         'Emin': float,
     }
-    results = pd.DataFrame([r for r in results if r]).fillna(0).astype(dtype)
+    # Build each column straight from the results with its final type, using
+    # 0 where a table doesn't have that metadata
+    names = dict.fromkeys(name for r in results for name in r)
+    results = pd.DataFrame({
+        name: pd.Series([r.get(name, 0) for r in results],
+                        dtype=dtype.get(name))
+        for name in names}, index=ddir.XSDIR.index)
 
-    ddir.XSDIR = pd.merge(ddir.XSDIR, results, on='ZAID')
+    # The results are in the same order as ddir.XSDIR, so line them up by
+    # position rather than joining on ZAID
+    ddir.XSDIR = ddir.XSDIR.join(results.drop(columns='ZAID'))
 
-    with open(xsdirName, 'w') as jsonFile:
-        json = ddir.XSDIR.to_json(orient='records', default_handler=str, indent=2)
-        jsonFile.write(json)
+    ddir.XSDIR.to_json(xsdirName, orient='records', default_handler=str)
 
     if ddir.problems:
         print("There were problems reading data from these ZAIDs:")
@@ -279,10 +347,11 @@ def processInput():
     parser = argparse.ArgumentParser(description=description)
 
     # Get default XSDIR
-    defaultXSDIR = max(
-        pathlib.Path(os.environ['DATAPATH']).glob("xsdir*"),
-        key = lambda p: p.stat().st_ctime
-    )
+    with os.scandir(os.environ['DATAPATH']) as entries:
+        defaultXSDIR = pathlib.Path(max(
+            (e for e in entries if e.name.startswith("xsdir")),
+            key = lambda e: e.stat().st_ctime
+        ).path)
 
     parser.add_argument('--xsdir', type=pathlib.Path,
         default = defaultXSDIR,
@@ -12,7 +12,20 @@ import os
 import pandas as pd
 import numpy as np
 
-_date_pattern = re.compile(r'\s*\d{2}\/\d{2}\/\d{2,4}\s*')
+# The xsdir is ASCII, so it is parsed as bytes without decoding
+_awr_pattern = re.compile(rb'^[ \t]*atomic weight ratios[ \t]*$', re.M)
+_date_pattern = re.compile(rb'^\s*\d{2}\/\d{2}\/\d{2,4}\s*', re.M)
+_directory_pattern = re.compile(rb'^[ \t]*directory[ \t]*$', re.M)
+_continuation_pattern = re.compile(rb'\+[ \t]*(?:\n|\Z)')
+
+def _toInt(value):
+    """
+    _toInt returns value as an int if it can be converted, otherwise value
+    """
+    try:
+        return int(value)
+    except ValueError:
+        return value
 
 def _addExtras(XSDIR):
     """
@@ -20,34 +33,22 @@ def _addExtras(XSDIR):
     information is extracted/calculated from the content already in the
     DataFrame.
     """
-    libTypes = []
-    ZAs = []
-    libraries = []
-
-    for entry in XSDIR.itertuples():
-        zaid = entry.ZAID
-        za = zaid.split('.')[0]
-        try:
-            za = int(za)
-        except ValueError:
-            za = za
-        ZAs.append(za)
-        lType = zaid[-1]
-        if lType == 'c':
-            if zaid[-2] == 'n':
-                lType = 'nc'
-        libTypes.append(lType)
-
-        path = entry.path
-        l = len(path.parents)
-        if l < 2:
-            libraries.append(entry.path)
-        else:
-            libraries.append(entry.path.parents[l-2])
-
-    XSDIR['library'] = libraries
-    XSDIR['lib_type'] = pd.Series(libTypes, dtype=str)
-    XSDIR['ZA'] = ZAs
+    ZAID = XSDIR['ZAID']
+    path = XSDIR['path']
+
+    # Top directory of the path, or the path itself when it has none
+    XSDIR['library'] = path.str.extract(r'^(/?[^/]+)/', expand=False) \
+                           .fillna(path)
+
+    # Last letter of the suffix, except 'nc'
+    XSDIR['lib_type'] = pd.Series(
+        np.where(ZAID.str[-2:] == 'nc', 'nc', ZAID.str[-1]),
+        index=XSDIR.index, dtype=str)
+
+    # ZA is an integer unless the ZAID doesn't have one (e.g., lwtr.20t). Many
+    # tables share a ZA, so each distinct one is only converted once
+    ZA = ZAID.str.split('.', n=1).str[0]
+    XSDIR['ZA'] = ZA.map({za: _toInt(za) for za in ZA.unique()})
     XSDIR['T(K)'] = round(XSDIR['temperature']/8.6173E-11, 1)
 
 def readXSDIR(filename=pathlib.Path(os.environ['DATAPATH'], 'xsdir')):
@@ -57,9 +58,6 @@ def readXSDIR(filename=pathlib.Path(os.environ['DATAPATH'], 'xsdir')):
         1. atomic weight ratios
         2. xsdir entries
     """
-    AWRs = []
-    entries = []
-
     columnType = {
         "ZAID":"U",
         "AWR":float,
@@ -74,38 +72,32 @@ def readXSDIR(filename=pathlib.Path(os.environ['DATAPATH'], 'xsdir')):
         "ptable":bool,
     }
 
-    with filename.open('r') as xsdirFile:
-        for line in xsdirFile:
-            if line.strip() == 'atomic weight ratios':
-                break
-
-        # Parse atomic weight ratios
-        for line in xsdirFile:
-            if _date_pattern.match(line):
-                break
-            AWRs.extend(line.split())
-
-        # Make sure we are in the directory listing
-        for line in xsdirFile:
-            if line.strip() == 'directory':
-                break
-
-        # Parse entries
-        lines = ""
-        for line in xsdirFile:
-            # Check if entry extends to next line
-            if line.strip().endswith('+'):
-                continuationIndex = line.rfind("+")
-                line = line[:continuationIndex] + xsdirFile.readline()
-
-            lines += line
-    AWRs = pd.DataFrame(np.reshape(AWRs, (-1, 2)), columns=["ZA", "AWR"]) \
-             .astype({"ZA":int, "AWR":
-                                                            float})
-    entries = pd.read_csv(io.StringIO(lines), sep='\s+', names=list(columnType)) \
+    # Line endings may be Windows ones
+    text = filename.read_bytes().replace(b'\r\n', b'\n')
+
+    # Atomic weight ratios are listed between their heading and the date
+    heading = _awr_pattern.search(text)
+    start = heading.end() if heading else len(text)
+    date = _date_pattern.search(text, start)
+    end = date.start() if date else len(text)
+    AWRs = text[start:end].split()
+
+    # Entries follow the directory heading; an entry ending in '+' continues
+    # on the next line
+    heading = _directory_pattern.search(text, end)
+    lines = _continuation_pattern.sub(b'', text[heading.end():]) \
+        if heading else b""
+
+    AWRs = pd.DataFrame({"ZA": np.array(AWRs[0::2], dtype=int),
+                         "AWR": np.array(AWRs[1::2], dtype=float)})
+    entries = pd.read_csv(io.BytesIO(lines), sep=r'\s+', names=list(columnType)) \
                 .fillna(0) \
                 .astype(columnType)
-    entries.path = entries.path.apply(pathlib.Path)
+    # Normalize the paths as pathlib does (e.g., './a//b/' is 'a/b'); a
+    # library has only a few distinct paths, so each is only converted once
+    paths = entries['path'].unique()
+    entries['path'] = entries['path'].map(
+        dict(zip(paths, map(str, map(pathlib.Path, paths)))))
     _addExtras(entries)
     return (AWRs, entries)
 